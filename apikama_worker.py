@@ -0,0 +1,16 @@
+# Gunicorn worker class used by the production launcher in serve.py
+#
+# Kept out of serve.py so that dev mode never imports gunicorn, which is not
+# available on every platform.
+
+from importlib.util import find_spec
+from uvicorn.workers import UvicornWorker
+
+
+class ApikamaWorker(UvicornWorker):
+    """Uvicorn worker pinned to uvloop and httptools when they are installed"""
+
+    CONFIG_KWARGS = {
+        "loop": "uvloop" if find_spec("uvloop") else "asyncio",
+        "http": "httptools" if find_spec("httptools") else "h11",
+    }
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class SortOrder(str, Enum):
+    DESCENDING = "desc"
+    ASCENDING = "asc"
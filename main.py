@@ -2,19 +2,35 @@
 # Author: Trey Hope
 # Created: December 2024
 
-from typing import Optional
-from fastapi import Body, Depends, FastAPI, Query, Request
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from fastapi import (
+    Body,
+    Depends,
+    FastAPI,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 from enums.api_tag import ApiTag
+from enums.sort_order import SortOrder
 from enums.ssl_option import SSLOption
+from middleware.deadline_middleware import DeadlineMiddleware
 from models.account import Account
 from models.requests.leaderboard_create_request import LeaderboardCreateRequest
 from models.session import Session
 from models.requests.email_auth_request import AccountEmail
 from models.responses.delete_account_response import DeleteAccountResponse
+from models.responses.leaderboard_analytics_response import (
+    LeaderboardAnalyticsResponse,
+)
 from models.responses.leaderboard_record_response import LeaderboardRecordResponse
 from models.responses.leaderboard_response import LeaderboardResponse
 from models.responses.update_account_response import UpdateAccountResponse
@@ -23,11 +39,20 @@ from services.account_service import (
     UpdateAccountRequest,
 )
 from services.encription_service import EncryptionService
-from services.leaderboard_service import LeaderboardService
+from services.leaderboard_analytics_service import LeaderboardAnalyticsService
+from services.leaderboard_service import MAX_RECORDS_LIMIT, LeaderboardService
 from static.api_descriptions import ApiDescriptions
+from utils.deadline_util import close_upstream_client
+from utils.leaderboard_format_util import (
+    LEADERBOARD_PAGE_RESPONSES,
+    leaderboard_page_response,
+    negotiate_leaderboard_format,
+)
+from utils.shard_group_util import get_shard_group
 
-# Command to run the server with hot reload
-# uvicorn main:app --reload
+# Command to run the server (see serve.py)
+# python serve.py
+# is_dev_mode runs it with hot reload; otherwise it starts the production workers.
 
 # NOTE: apikama-prod cannot use the local game server.
 
@@ -40,6 +65,13 @@ templates: Jinja2Templates = Jinja2Templates(
     directory="templates",
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Closes the shared upstream connection pool on shutdown"""
+    yield
+    await close_upstream_client()
+
+
 # Initialize FastAPI application with metadata and documentation endpoints
 app = FastAPI(
     title=_title,
@@ -48,8 +80,12 @@ app = FastAPI(
     docs_url="/docs",  # Swagger UI endpoint
     redoc_url="/redoc",  # ReDoc endpoint
     swagger_ui_parameters={"docExpansion": "none"},
+    lifespan=lifespan,
 )
 
+# Enforce the request deadline inside CORS so timeouts still carry CORS headers
+app.add_middleware(DeadlineMiddleware)
+
 # Configure CORS middleware to allow cross-origin requests
 app.add_middleware(
     CORSMiddleware,
@@ -83,6 +119,11 @@ def get_leaderboard_deps() -> LeaderboardService:
     return LeaderboardService()
 
 
+def get_leaderboard_analytics_deps() -> LeaderboardAnalyticsService:
+    """Provides LeaderboardAnalyticsService instance for dependency injection"""
+    return LeaderboardAnalyticsService(LeaderboardService())
+
+
 def get_encryption_deps() -> EncryptionService:
     """?"""
     return EncryptionService()
@@ -236,19 +277,34 @@ async def default(request: Request):
     tags=[ApiTag.LEADERBOARD],
     description="Retrieves leaderboard records.",
     response_model=LeaderboardResponse,
+    responses=LEADERBOARD_PAGE_RESPONSES,
     name="Get Leaderboard Records",
 )
 async def getLeaderboardRecords(
     limit: int,
+    response: Response,
     api_key: str = Query(..., description=ApiDescriptions.API_KEY),
     session_token: str = Query(..., description=ApiDescriptions.SESSION_TOKEN),
     leaderboard_id: str = Query(..., example="weekly_leaderboard"),
     next_cursor: Optional[str] = Query(default=None),
+    accept: Optional[str] = Header(default=None, description=ApiDescriptions.ACCEPT),
     encryption_service: EncryptionService = Depends(get_encryption_deps),
     leaderboard: LeaderboardService = Depends(get_leaderboard_deps),
 ):
     """Retrieves leaderboard records"""
     server_string = encryption_service.decrypt_server_string(api_key)
+    media_type = negotiate_leaderboard_format(accept)
+    if media_type is not None:
+        records, next_cursor = await leaderboard.get_records_page(
+            server_string,
+            session_token,
+            leaderboard_id,
+            limit,
+            next_cursor,
+        )
+        return leaderboard_page_response(records, next_cursor, media_type)
+
+    response.headers["Vary"] = "Accept"
     return await leaderboard.get_records(
         server_string,
         session_token,
@@ -258,6 +314,113 @@ async def getLeaderboardRecords(
     )
 
 
+@app.get(
+    "/leaderboard/global",
+    tags=[ApiTag.LEADERBOARD],
+    description="Retrieves leaderboard records merged across several Nakama servers, ranked globally.",
+    response_model=LeaderboardResponse,
+    responses=LEADERBOARD_PAGE_RESPONSES,
+    name="Get Global Leaderboard Records",
+)
+async def getGlobalLeaderboardRecords(
+    response: Response,
+    limit: int = Query(..., ge=1, le=MAX_RECORDS_LIMIT),
+    api_keys: List[str] = Query(default=[], description=ApiDescriptions.API_KEYS),
+    shard_group: Optional[str] = Query(
+        default=None, description=ApiDescriptions.SHARD_GROUP
+    ),
+    session_tokens: List[str] = Query(..., description=ApiDescriptions.SESSION_TOKENS),
+    leaderboard_id: str = Query(..., example="weekly_leaderboard"),
+    next_cursor: Optional[str] = Query(default=None),
+    order: SortOrder = Query(
+        default=SortOrder.DESCENDING, description=ApiDescriptions.SORT_ORDER
+    ),
+    accept: Optional[str] = Header(default=None, description=ApiDescriptions.ACCEPT),
+    encryption_service: EncryptionService = Depends(get_encryption_deps),
+    leaderboard: LeaderboardService = Depends(get_leaderboard_deps),
+):
+    """Retrieves leaderboard records merged across several Nakama servers"""
+    if shard_group is not None:
+        api_keys = api_keys + get_shard_group(shard_group)
+    if not api_keys:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Provide api_keys or a shard_group.",
+        )
+    # A single session token is shared by every shard.
+    if len(session_tokens) == 1:
+        session_tokens = session_tokens * len(api_keys)
+    if len(session_tokens) != len(api_keys):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Provide one session token, or one per shard.",
+        )
+    server_strings = [
+        encryption_service.decrypt_server_string(api_key) for api_key in api_keys
+    ]
+    media_type = negotiate_leaderboard_format(accept)
+    if media_type is not None:
+        records, next_cursor = await leaderboard.get_global_records_page(
+            server_strings,
+            session_tokens,
+            leaderboard_id,
+            limit,
+            next_cursor,
+            order,
+        )
+        return leaderboard_page_response(records, next_cursor, media_type)
+
+    response.headers["Vary"] = "Accept"
+    return await leaderboard.get_global_records(
+        server_strings,
+        session_tokens,
+        leaderboard_id,
+        limit,
+        next_cursor,
+        order,
+    )
+
+
+@app.get(
+    "/leaderboard/analytics",
+    tags=[ApiTag.LEADERBOARD],
+    description="Computes score percentiles, a histogram and top X% thresholds for a leaderboard from periodic full scans.",
+    response_model=LeaderboardAnalyticsResponse,
+    name="Get Leaderboard Analytics",
+)
+async def getLeaderboardAnalytics(
+    api_key: str = Query(..., description=ApiDescriptions.API_KEY),
+    session_token: str = Query(..., description=ApiDescriptions.SESSION_TOKEN),
+    leaderboard_id: str = Query(..., example="weekly_leaderboard"),
+    percentiles: List[float] = Query(
+        default=[50, 90, 99], description=ApiDescriptions.PERCENTILES
+    ),
+    top_percents: List[float] = Query(
+        default=[1, 5, 10], description=ApiDescriptions.TOP_PERCENTS
+    ),
+    bins: int = Query(default=10, ge=1, le=1000),
+    max_age: float = Query(default=60, ge=0, description=ApiDescriptions.MAX_AGE),
+    encryption_service: EncryptionService = Depends(get_encryption_deps),
+    analytics: LeaderboardAnalyticsService = Depends(get_leaderboard_analytics_deps),
+):
+    """Computes score statistics for a leaderboard"""
+    if any(not 0 <= value <= 100 for value in percentiles + top_percents):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Percentiles must be between 0 and 100.",
+        )
+    server_string = encryption_service.decrypt_server_string(api_key)
+    return await analytics.get_analytics(
+        server_string,
+        session_token,
+        leaderboard_id,
+        percentiles,
+        top_percents,
+        bins,
+        max_age,
+    )
+
+
 @app.post(
     "/createLeaderboardRecord",
     tags=[ApiTag.LEADERBOARD],
@@ -0,0 +1,83 @@
+import asyncio
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils.deadline_util import (
+    DEADLINE_HEADER,
+    parse_deadline,
+    reset_deadline,
+    set_deadline,
+)
+
+
+class DeadlineMiddleware:
+    """
+    Enforces an end-to-end deadline on every HTTP request.
+
+    The handler runs as its own task under the request's deadline, which the
+    services read back to bound their upstream calls. The task is cancelled
+    when the deadline passes (answered with a 504) or when the client
+    disconnects (nothing is sent).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            budget = parse_deadline(Headers(scope=scope).get(DEADLINE_HEADER))
+        except ValueError:
+            response = JSONResponse(
+                {"detail": "X-Request-Timeout must be a positive number of seconds."},
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+            await response(scope, receive, send)
+            return
+
+        state = {"started": False, "complete": False, "disconnected": False}
+        messages: asyncio.Queue[Message] = asyncio.Queue()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                state["started"] = True
+            elif message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                state["complete"] = True
+            await send(message)
+
+        # The task inherits the deadline from the current context.
+        token = set_deadline(budget)
+        app_task = asyncio.create_task(self.app(scope, messages.get, send_wrapper))
+
+        async def watch_disconnect() -> None:
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    if not state["complete"]:
+                        state["disconnected"] = True
+                        app_task.cancel()
+                    return
+
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            await asyncio.wait_for(app_task, budget)
+        except asyncio.TimeoutError:
+            if not state["started"]:
+                response = JSONResponse(
+                    {"detail": "Request deadline exceeded."},
+                    status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                )
+                await response(scope, messages.get, send)
+        except asyncio.CancelledError:
+            if not state["disconnected"]:
+                raise
+        finally:
+            watcher.cancel()
+            reset_deadline(token)
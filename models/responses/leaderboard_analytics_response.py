@@ -0,0 +1,24 @@
+from typing import Dict, List
+from pydantic import BaseModel
+
+
+class ScoreHistogram(BaseModel):
+    bin_edges: List[float]
+    counts: List[int]
+
+
+class LeaderboardAnalyticsResponse(BaseModel):
+    leaderboard_id: str
+    count: int
+    min_score: int | None = None
+    max_score: int | None = None
+    mean_score: float | None = None
+    std_score: float | None = None
+    percentiles: Dict[str, float]
+    top_thresholds: Dict[str, float]
+    histogram: ScoreHistogram
+    mean_num_score: float | None = None
+    max_num_score: int | None = None
+    first_update_time: int | None = None
+    last_update_time: int | None = None
+    refreshed_at: int
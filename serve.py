@@ -0,0 +1,136 @@
+# Launcher for the Apikama service
+#
+# python serve.py
+#
+# With is_dev_mode set in main.py this runs a single uvicorn process with hot
+# reload. Otherwise the app is preloaded once and forked into gunicorn
+# workers running uvicorn on the fastest available event loop and HTTP parser.
+
+import time
+
+_launch_started: float = time.perf_counter()
+
+import os
+import signal
+import threading
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Dev mode only listens locally unless HOST says otherwise.
+HOST: str | None = os.getenv("HOST")
+PORT: int = int(os.getenv("PORT", "8000"))
+WORKERS: int = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+# Recycle a worker after this many requests (0 disables), jittered so workers don't restart together.
+MAX_REQUESTS: int = int(os.getenv("MAX_REQUESTS", "10000"))
+MAX_REQUESTS_JITTER: int = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))
+# Recycle a worker once its resident memory passes this many MB (0 disables).
+MAX_WORKER_MEMORY_MB: int = int(os.getenv("MAX_WORKER_MEMORY_MB", "512"))
+MEMORY_CHECK_INTERVAL_SECONDS: float = 10.0
+GRACEFUL_TIMEOUT_SECONDS: int = int(os.getenv("GRACEFUL_TIMEOUT_SECONDS", "30"))
+
+
+def _preload():
+    """Imports the app and does its one-off startup work before workers fork"""
+    from main import app, templates
+    from services.encription_service import EncryptionService
+
+    EncryptionService()  # Reads ENCRYPTION_KEY, failing fast if it is missing
+    templates.get_template("index.html")
+    app.openapi()
+    return app
+
+
+def _resident_memory_mb() -> float | None:
+    """Current resident memory of this process, or None where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _watch_memory(worker) -> None:
+    """Asks the worker to shut down gracefully once it exceeds the memory ceiling"""
+    while True:
+        time.sleep(MEMORY_CHECK_INTERVAL_SECONDS)
+        memory_mb = _resident_memory_mb()
+        if memory_mb is not None and memory_mb > MAX_WORKER_MEMORY_MB:
+            worker.log.info(
+                "Worker %s using %.0f MB (limit %d MB), recycling",
+                worker.pid,
+                memory_mb,
+                MAX_WORKER_MEMORY_MB,
+            )
+            os.kill(worker.pid, signal.SIGTERM)
+            return
+
+
+def _when_ready(server) -> None:
+    server.log.info(
+        "Apikama ready in %.3fs with %d workers",
+        time.perf_counter() - _launch_started,
+        WORKERS,
+    )
+
+
+def _post_fork(server, worker) -> None:
+    # Runs in the new worker, so recycled workers are timed from their own fork.
+    worker.forked_at = time.perf_counter()
+
+
+def _post_worker_init(worker) -> None:
+    worker.log.info(
+        "Worker %s ready %.3fs after fork",
+        worker.pid,
+        time.perf_counter() - worker.forked_at,
+    )
+    if MAX_WORKER_MEMORY_MB <= 0:
+        return
+    if _resident_memory_mb() is None:
+        worker.log.warning("Current memory usage unavailable, memory ceiling disabled")
+        return
+    threading.Thread(target=_watch_memory, args=(worker,), daemon=True).start()
+
+
+def _run_production() -> None:
+    from gunicorn.app.base import BaseApplication
+
+    class ApikamaApplication(BaseApplication):
+        def __init__(self, app):
+            self.application = app
+            super().__init__()
+
+        def load_config(self) -> None:
+            self.cfg.set("bind", f"{HOST or '0.0.0.0'}:{PORT}")
+            self.cfg.set("workers", WORKERS)
+            self.cfg.set("worker_class", "apikama_worker.ApikamaWorker")
+            self.cfg.set("preload_app", True)
+            self.cfg.set("max_requests", MAX_REQUESTS)
+            self.cfg.set("max_requests_jitter", MAX_REQUESTS_JITTER)
+            self.cfg.set("graceful_timeout", GRACEFUL_TIMEOUT_SECONDS)
+            self.cfg.set("when_ready", _when_ready)
+            self.cfg.set("post_fork", _post_fork)
+            self.cfg.set("post_worker_init", _post_worker_init)
+
+        def load(self):
+            return self.application
+
+    ApikamaApplication(_preload()).run()
+
+
+def _run_dev() -> None:
+    import uvicorn
+
+    uvicorn.run("main:app", host=HOST or "127.0.0.1", port=PORT, reload=True)
+
+
+if __name__ == "__main__":
+    from main import is_dev_mode
+
+    if is_dev_mode:
+        _run_dev()
+    else:
+        _run_production()
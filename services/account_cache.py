@@ -0,0 +1,137 @@
+import mmap
+import os
+import time
+import zlib
+from collections import OrderedDict
+from dotenv import load_dotenv
+from models.account import Account
+from models.requests.update_account_request import UpdateAccountRequest
+from utils.session_token_util import token_digest
+
+# Load environment variables
+load_dotenv()
+
+# UpdateAccountRequest fields and the User fields they change.
+_USER_FIELDS = {
+    "username": "username",
+    "display_name": "displayName",
+    "avatar_url": "avatarUrl",
+    "lang_tag": "langTag",
+}
+
+
+class _Entry:
+    def __init__(self):
+        self.account: Account | None = None
+        # Wall-clock times, comparable with the stamps other workers write.
+        self.filled_at = 0.0
+        self.expires_at = 0.0
+        # Digests of session tokens Nakama has accepted for this user.
+        self.tokens: set[str] = set()
+
+
+class _WriteStamps:
+    """
+    Time of each user's last account write, in memory shared by forked workers.
+
+    Keys are hashed into a fixed number of slots; a collision only makes a
+    cached account look older than it is.
+    """
+
+    def __init__(self, slots: int):
+        self._slots = slots
+        # Anonymous mmaps are MAP_SHARED, so workers forked later see each other's writes.
+        self._buffer = mmap.mmap(-1, slots * 8)
+        self._stamps = memoryview(self._buffer).cast("d")
+
+    def get(self, key: tuple[str, str]) -> float:
+        return self._stamps[self._slot(key)]
+
+    def set(self, key: tuple[str, str], stamp: float) -> None:
+        self._stamps[self._slot(key)] = stamp
+
+    def _slot(self, key: tuple[str, str]) -> int:
+        return zlib.crc32("\0".join(key).encode("utf-8")) % self._slots
+
+
+class AccountCache:
+    """
+    Bounded LRU cache of accounts keyed on (server base URL, user id).
+
+    An account is only served to a session token that Nakama has already
+    accepted for that user, since the user id is read from the unverified
+    token. Every write records its time in memory shared by all workers
+    forked from the process that created the cache (the preloading launcher
+    in serve.py creates it before forking), so a worker never serves or
+    stores an account read before the user's last write on any worker.
+    Workers started independently of each other do not share those times.
+    """
+
+    def __init__(
+        self,
+        ttl: float = float(os.getenv("ACCOUNT_CACHE_TTL_SECONDS", "30")),
+        max_entries: int = int(os.getenv("ACCOUNT_CACHE_MAX_ENTRIES", "10000")),
+        stamp_slots: int = int(os.getenv("ACCOUNT_CACHE_WRITE_SLOTS", "65536")),
+    ):
+        self.ttl = ttl
+        # Zero or less disables caching.
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+        self._write_stamps = _WriteStamps(stamp_slots)
+
+    def get(self, key: tuple[str, str], session_token: str) -> Account | None:
+        entry = self._entries.get(key)
+        if entry is None or entry.account is None or entry.expires_at <= time.time():
+            return None
+        if entry.filled_at < self._write_stamps.get(key):
+            return None
+        if token_digest(session_token) not in entry.tokens:
+            return None
+        self._entries.move_to_end(key)
+        return entry.account
+
+    def put(
+        self, key: tuple[str, str], session_token: str, account: Account, started_at: float
+    ) -> None:
+        """Stores an account read from Nakama by a request started at started_at"""
+        if self.max_entries <= 0:
+            return
+        write_stamp = self._write_stamps.get(key)
+        if write_stamp > started_at:
+            return
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry()
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+        now = time.time()
+        if entry.expires_at <= now or entry.filled_at < write_stamp:
+            entry.tokens.clear()
+        entry.account = account
+        entry.filled_at = now
+        entry.expires_at = now + self.ttl
+        entry.tokens.add(token_digest(session_token))
+
+    def patch(self, key: tuple[str, str], update_data: UpdateAccountRequest) -> None:
+        """Applies a successful account update to the cached account"""
+        now = time.time()
+        self._write_stamps.set(key, now)
+        entry = self._entries.get(key)
+        if entry is None or entry.account is None:
+            return
+        changes = {
+            _USER_FIELDS[field]: value
+            for field, value in update_data.model_dump(exclude_none=True).items()
+            if field in _USER_FIELDS
+        }
+        entry.account = entry.account.model_copy(
+            update={"user": entry.account.user.model_copy(update=changes)}
+        )
+        entry.filled_at = now
+
+    def evict(self, key: tuple[str, str]) -> None:
+        """Forgets the account, e.g. after it was deleted"""
+        self._write_stamps.set(key, time.time())
+        self._entries.pop(key, None)
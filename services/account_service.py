@@ -1,26 +1,37 @@
+import time
 from typing import Dict
 from fastapi import HTTPException
-import requests
 from models.account import Account
 from models.requests.update_account_request import UpdateAccountRequest
 from models.responses.delete_account_response import DeleteAccountResponse
 from models.responses.update_account_response import UpdateAccountResponse
 from models.user import User
+from services.account_cache import AccountCache
 from services.base_api_service import BaseAPIService
 from utils.server_string_util import buildClientConfig
 from fastapi import HTTPException
-import requests
 from email_validator import EmailNotValidError
 from models.requests.email_auth_request import AccountEmail
 from models.session import Session
 from utils.server_string_util import buildClientConfig, encode_auth
+from utils.deadline_util import upstream_request
+from utils.session_token_util import get_session_user_id
 from utils.validators import validate_password
 
 
 class AccountService(BaseAPIService):
+    # Shared by every request so that reads, updates and deletes see one cache.
+    _cache = AccountCache()
+
     def _build_endpoint(self, base_url: str) -> str:
         return f"{base_url}account"
 
+    def _cache_key(self, base_url: str, session_token: str) -> tuple[str, str] | None:
+        user_id = get_session_user_id(session_token)
+        if user_id is None:
+            return None
+        return base_url, user_id
+
     def _parse_user_data(self, data: Dict) -> User:
         user_data = data.get("user", {})
         return User(
@@ -37,13 +48,23 @@ class AccountService(BaseAPIService):
         base_url, headers = self._get_base_config(server_string, session_token)
         endpoint = self._build_endpoint(base_url)
 
-        response = requests.get(endpoint, headers=headers)
+        cache_key = self._cache_key(base_url, session_token)
+        if cache_key is not None:
+            account = self._cache.get(cache_key, session_token)
+            if account is not None:
+                return account
+        started_at = time.time()
+
+        response = await upstream_request("GET", endpoint, headers=headers)
         self._handle_response_errors(response, "get")
 
         data = response.json()
         user = self._parse_user_data(data)
 
-        return Account(user=user, email=data.get("email"), wallet=data.get("wallet"))
+        account = Account(user=user, email=data.get("email"), wallet=data.get("wallet"))
+        if cache_key is not None and cache_key[1] == user.id:
+            self._cache.put(cache_key, session_token, account, started_at)
+        return account
 
     async def delete(
         self, server_string: str, session_token: str
@@ -51,11 +72,16 @@ class AccountService(BaseAPIService):
         """Delete user account"""
         base_url, headers = self._get_base_config(server_string, session_token)
         endpoint = self._build_endpoint(base_url)
-        response = requests.delete(
+        response = await upstream_request(
+            "DELETE",
             endpoint,
             headers=headers,
         )
         self._handle_response_errors(response, "delete")
+
+        cache_key = self._cache_key(base_url, session_token)
+        if cache_key is not None:
+            self._cache.evict(cache_key)
         return DeleteAccountResponse()
 
     async def update(
@@ -65,10 +91,14 @@ class AccountService(BaseAPIService):
         base_url, headers = self._get_base_config(server_string, session_token)
         endpoint = self._build_endpoint(base_url)
 
-        response = requests.put(
-            endpoint, headers=headers, json=update_data.model_dump(exclude_none=True)
+        response = await upstream_request(
+            "PUT", endpoint, headers=headers, json=update_data.model_dump(exclude_none=True)
         )
         self._handle_response_errors(response, "update")
+
+        cache_key = self._cache_key(base_url, session_token)
+        if cache_key is not None:
+            self._cache.patch(cache_key, update_data)
         return UpdateAccountResponse()
 
     async def authenticate_email(
@@ -93,7 +123,8 @@ class AccountService(BaseAPIService):
                 "create": request.create,
             }
 
-            response = requests.post(
+            response = await upstream_request(
+                "POST",
                 f"{base_url}account/authenticate/email{f'?username={request.username}' if request.username else ''}",
                 headers=headers,
                 json=data,
@@ -1,6 +1,6 @@
 from typing import Dict
 from fastapi import HTTPException, status
-import requests
+import httpx
 from utils.server_string_util import buildClientConfig, get_base_url
 
 
@@ -25,7 +25,7 @@ class BaseAPIService:
        return headers
 
     def _handle_response_errors(
-        self, response: requests.Response, operation: str
+        self, response: httpx.Response, operation: str
     ) -> None:
         if response.status_code == status.HTTP_401_UNAUTHORIZED:
             raise HTTPException(
@@ -33,7 +33,7 @@ class BaseAPIService:
             )
         try:
             response.raise_for_status()
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPStatusError as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Operation failed: {str(e)}.",
@@ -0,0 +1,307 @@
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+import httpx
+import numpy as np
+from models.responses.leaderboard_analytics_response import (
+    LeaderboardAnalyticsResponse,
+    ScoreHistogram,
+)
+from utils.deadline_util import set_deadline
+from utils.session_token_util import get_session_expiry, token_digest
+from utils.time_util import to_epoch_seconds
+
+if TYPE_CHECKING:
+    from services.leaderboard_service import LeaderboardService
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Largest page Nakama accepts when listing leaderboard records.
+_PAGE_SIZE = 10000
+_INITIAL_CAPACITY = 1024
+# Accepted session tokens remembered per board before expired ones are pruned.
+_MAX_BOARD_TOKENS = 1000
+
+MAX_BOARDS = max(1, int(os.getenv("ANALYTICS_MAX_BOARDS", "100")))
+# Lower bound on max_age, so clients cannot keep boards under constant rescans.
+MIN_SCAN_INTERVAL_SECONDS = float(os.getenv("ANALYTICS_MIN_SCAN_INTERVAL_SECONDS", "30"))
+# Upstream budget of each page read by a background scan.
+SCAN_PAGE_TIMEOUT_SECONDS = float(os.getenv("ANALYTICS_SCAN_PAGE_TIMEOUT_SECONDS", "60"))
+
+
+class _BoardColumns:
+    """Column store of one leaderboard's records, one numeric array per field."""
+
+    def __init__(self):
+        self.owner_index: Dict[str, int] = {}
+        self.owners: List[str] = []
+        self.scores = np.zeros(_INITIAL_CAPACITY, dtype=np.int64)
+        self.num_scores = np.zeros(_INITIAL_CAPACITY, dtype=np.int64)
+        self.update_times = np.zeros(_INITIAL_CAPACITY, dtype=np.int64)
+        self.seen = np.zeros(_INITIAL_CAPACITY, dtype=bool)
+        self.version = 0
+        self.refreshed_at = 0.0
+        self.scan: asyncio.Task | None = None
+        # Digests of session tokens Nakama accepted for this board, with their expiry.
+        self.tokens: Dict[str, float] = {}
+        self.stats_key: tuple | None = None
+        self.stats: LeaderboardAnalyticsResponse | None = None
+
+    @property
+    def size(self) -> int:
+        return len(self.owners)
+
+    def accepts(self, session_token: str) -> bool:
+        return self.tokens.get(token_digest(session_token), 0) > time.time()
+
+    def accept(self, session_token: str) -> None:
+        if len(self.tokens) >= _MAX_BOARD_TOKENS:
+            now = time.time()
+            self.tokens = {
+                digest: expiry for digest, expiry in self.tokens.items() if expiry > now
+            }
+            if len(self.tokens) >= _MAX_BOARD_TOKENS:
+                self.tokens.clear()
+        self.tokens[token_digest(session_token)] = get_session_expiry(session_token)
+
+    def upsert(self, records: List[Dict]) -> None:
+        """Writes records in place by owner, appending owners not seen before"""
+        for record in records:
+            owner_id = record["owner_id"]
+            index = self.owner_index.get(owner_id)
+            if index is None:
+                index = self.size
+                self._reserve(index + 1)
+                self.owner_index[owner_id] = index
+                self.owners.append(owner_id)
+            self.scores[index] = int(record.get("score", 0))
+            self.num_scores[index] = int(record.get("num_score", 0))
+            self.update_times[index] = to_epoch_seconds(record.get("update_time"))
+            self.seen[index] = True
+        if records:
+            self.version += 1
+
+    def begin_scan(self) -> None:
+        self.seen[: self.size] = False
+
+    def end_scan(self) -> None:
+        """Drops records that a full scan no longer returned, e.g. expired ones"""
+        keep = self.seen[: self.size]
+        if keep.all():
+            return
+        self.owners = [owner for owner, kept in zip(self.owners, keep) if kept]
+        self.owner_index = {owner: index for index, owner in enumerate(self.owners)}
+        for name in ("scores", "num_scores", "update_times", "seen"):
+            column = getattr(self, name)
+            kept = column[: len(keep)][keep]
+            column[: kept.size] = kept
+        self.version += 1
+
+    def _reserve(self, capacity: int) -> None:
+        if capacity <= self.scores.size:
+            return
+        new_capacity = max(capacity, self.scores.size * 2)
+        for name in ("scores", "num_scores", "update_times", "seen"):
+            column = getattr(self, name)
+            grown = np.zeros(new_capacity, dtype=column.dtype)
+            grown[: column.size] = column
+            setattr(self, name, grown)
+
+
+class LeaderboardAnalyticsService:
+    """
+    Score analytics over leaderboards held in memory as NumPy columns.
+
+    A board is read in full by periodic scans: the first request for a board
+    waits for the initial scan, and later requests that find the board older
+    than max_age (never less than ANALYTICS_MIN_SCAN_INTERVAL_SECONDS) start a
+    background scan and are answered from the last snapshot meanwhile. Between
+    scans, records that pass through /leaderboard or createLeaderboardRecord
+    are folded in as they are seen.
+    """
+
+    # Boards are shared by every request, keyed on (server_string, leaderboard_id).
+    _boards: OrderedDict[tuple[str, str], _BoardColumns] = OrderedDict()
+
+    def __init__(self, leaderboard_service: "LeaderboardService"):
+        self.leaderboard_service = leaderboard_service
+
+    @classmethod
+    def observe(
+        cls, server_string: str, leaderboard_id: str, records: List[Dict]
+    ) -> None:
+        """Folds records seen elsewhere into the board's columns if it is cached"""
+        board = cls._boards.get((server_string, leaderboard_id))
+        if board is not None and board.refreshed_at:
+            board.upsert(records)
+
+    async def get_analytics(
+        self,
+        server_string: str,
+        session_token: str,
+        leaderboard_id: str,
+        percentiles: List[float],
+        top_percents: List[float],
+        bins: int,
+        max_age: float,
+    ) -> LeaderboardAnalyticsResponse:
+        key = (server_string, leaderboard_id)
+        board = self._boards.get(key)
+        if board is None:
+            board = self._boards[key] = _BoardColumns()
+            while len(self._boards) > MAX_BOARDS:
+                self._boards.popitem(last=False)
+        self._boards.move_to_end(key)
+
+        if not board.refreshed_at:
+            # The scan keeps running if this request gives up waiting for it.
+            await asyncio.shield(self._start_scan(board, key, session_token))
+
+        # Cached columns are only shown to, and rescans only started by,
+        # sessions Nakama has accepted for this board.
+        if not board.accepts(session_token):
+            await self._verify_session(board, server_string, session_token, leaderboard_id)
+
+        if time.time() - board.refreshed_at > max(max_age, MIN_SCAN_INTERVAL_SECONDS):
+            self._start_scan(board, key, session_token)
+
+        stats_key = (board.version, tuple(percentiles), tuple(top_percents), bins)
+        if board.stats_key != stats_key:
+            board.stats = self._compute(
+                board, leaderboard_id, percentiles, top_percents, bins
+            )
+            board.stats_key = stats_key
+        return board.stats
+
+    def _start_scan(
+        self, board: _BoardColumns, key: tuple[str, str], session_token: str
+    ) -> asyncio.Task:
+        if board.scan is None:
+            # A fresh context keeps the scan outside the triggering request's deadline.
+            board.scan = asyncio.create_task(
+                self._scan(board, key, session_token),
+                context=contextvars.Context(),
+            )
+            board.scan.add_done_callback(_log_scan_failure)
+        return board.scan
+
+    async def _scan(
+        self, board: _BoardColumns, key: tuple[str, str], session_token: str
+    ) -> None:
+        """Re-reads every page, updating the existing columns in place"""
+        server_string, leaderboard_id = key
+        try:
+            board.begin_scan()
+            cursor = None
+            while True:
+                set_deadline(SCAN_PAGE_TIMEOUT_SECONDS)
+                records, cursor = await self.leaderboard_service.fetch_records_page(
+                    server_string, session_token, leaderboard_id, _PAGE_SIZE, cursor
+                )
+                board.upsert(records)
+                if not cursor:
+                    break
+            board.end_scan()
+            board.refreshed_at = time.time()
+            board.accept(session_token)
+        except Exception as e:
+            if not board.refreshed_at and self._boards.get(key) is board:
+                # Never keep a board that was not fully read.
+                del self._boards[key]
+            if isinstance(e, httpx.HTTPError):
+                raise _upstream_error(e)
+            raise
+        finally:
+            board.scan = None
+
+    async def _verify_session(
+        self,
+        board: _BoardColumns,
+        server_string: str,
+        session_token: str,
+        leaderboard_id: str,
+    ) -> None:
+        """Lets Nakama check the session with the smallest possible read"""
+        try:
+            await self.leaderboard_service.fetch_records_page(
+                server_string, session_token, leaderboard_id, 1
+            )
+        except httpx.HTTPError as e:
+            raise _upstream_error(e)
+        board.accept(session_token)
+
+    def _compute(
+        self,
+        board: _BoardColumns,
+        leaderboard_id: str,
+        percentiles: List[float],
+        top_percents: List[float],
+        bins: int,
+    ) -> LeaderboardAnalyticsResponse:
+        count = board.size
+        scores = board.scores[:count]
+        num_scores = board.num_scores[:count]
+        update_times = board.update_times[:count]
+
+        if count == 0:
+            return LeaderboardAnalyticsResponse(
+                leaderboard_id=leaderboard_id,
+                count=0,
+                percentiles={},
+                top_thresholds={},
+                histogram=ScoreHistogram(bin_edges=[], counts=[]),
+                refreshed_at=int(board.refreshed_at),
+            )
+
+        # The top X% of players score at or above the (100 - X)th percentile.
+        thresholds = np.percentile(scores, [100 - top for top in top_percents])
+        counts, bin_edges = np.histogram(scores, bins=bins)
+        timed = update_times[update_times > 0]
+
+        return LeaderboardAnalyticsResponse(
+            leaderboard_id=leaderboard_id,
+            count=count,
+            min_score=int(scores.min()),
+            max_score=int(scores.max()),
+            mean_score=float(scores.mean()),
+            std_score=float(scores.std()),
+            percentiles=dict(
+                zip(map(str, percentiles), np.percentile(scores, percentiles).tolist())
+            ),
+            top_thresholds=dict(zip(map(str, top_percents), thresholds.tolist())),
+            histogram=ScoreHistogram(
+                bin_edges=bin_edges.tolist(), counts=counts.tolist()
+            ),
+            mean_num_score=float(num_scores.mean()),
+            max_num_score=int(num_scores.max()),
+            first_update_time=int(timed.min()) if timed.size else None,
+            last_update_time=int(timed.max()) if timed.size else None,
+            refreshed_at=int(board.refreshed_at),
+        )
+
+
+def _upstream_error(e: httpx.HTTPError) -> HTTPException:
+    if (
+        isinstance(e, httpx.HTTPStatusError)
+        and e.response.status_code == status.HTTP_401_UNAUTHORIZED
+    ):
+        return HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized access."
+        )
+    return HTTPException(
+        status_code=500, detail=f"Failed to get leaderboard records: {str(e)}"
+    )
+
+
+def _log_scan_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Leaderboard scan failed: %s", task.exception())
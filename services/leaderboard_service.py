@@ -1,13 +1,27 @@
-from typing import Any, List
-from fastapi import HTTPException
-import requests
+import asyncio
+import heapq
+from typing import Any, Dict, List
+from urllib.parse import quote
+from fastapi import HTTPException, status
+import httpx
+from enums.sort_order import SortOrder
 from models.client_config import ClientConfig
 from models.requests.leaderboard_create_request import LeaderboardCreateRequest
 from models.responses.leaderboard_record_response import (
     LeaderboardRecordResponse,
 )
 from models.responses.leaderboard_response import LeaderboardResponse
+from services.leaderboard_analytics_service import LeaderboardAnalyticsService
+from utils.deadline_util import upstream_request
 from utils.server_string_util import buildClientConfig, encode_auth, get_base_url
+from utils.shard_cursor_util import (
+    ShardPosition,
+    decode_shard_cursor,
+    encode_shard_cursor,
+)
+
+# Largest number of records Nakama returns in one leaderboard listing.
+MAX_RECORDS_LIMIT = 10000
 
 
 class BaseLeaderboardService:
@@ -41,9 +55,12 @@ class LeaderboardService(BaseLeaderboardService):
             data = {
                 "score": request.score,
             }
-            response: Any = requests.post(endpoint, headers=headers, json=data)
+            response: Any = await upstream_request(
+                "POST", endpoint, headers=headers, json=data
+            )
             response.raise_for_status()
             data = response.json()
+            LeaderboardAnalyticsService.observe(server_string, leaderboard_id, [data])
 
             return LeaderboardRecordResponse(
                 leaderboard_id=data["leaderboard_id"],
@@ -57,11 +74,38 @@ class LeaderboardService(BaseLeaderboardService):
                 rank=data["rank"],
                 max_num_score=data["max_num_score"],
             )
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             raise HTTPException(
                 status_code=500, detail=f"Failed to create record: {str(e)}"
             )
 
+    async def fetch_records_page(
+        self,
+        server_string: str,
+        session_token: str,
+        leaderboard_id: str,
+        limit: int,
+        cursor: str | None = None,
+    ) -> tuple[List[Dict], str]:
+        """Fetches one raw page of records and the cursor to the next page."""
+        endpoint = await self._setup_auth(server_string, leaderboard_id)
+        headers = {**self.headers, "Authorization": f"Bearer {session_token}"}
+
+        # Apply required limit.
+        endpoint += f"?limit={limit}"
+
+        # Use optional cursor.
+        if cursor:
+            endpoint += f"&cursor={quote(cursor)}"
+
+        response: Any = await upstream_request("GET", endpoint, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+        if not data:
+            return [], ""
+
+        return data.get("records", []), data.get("next_cursor", "")
+
     async def get_records(
         self,
         server_string: str,
@@ -70,40 +114,219 @@ class LeaderboardService(BaseLeaderboardService):
         limit: int,
         next_cursor: str | None = None,
     ) -> LeaderboardResponse:
-        try:
-            endpoint = await self._setup_auth(server_string, leaderboard_id)
-            headers = {**self.headers, "Authorization": f"Bearer {session_token}"}
+        records, next_cursor = await self.get_records_page(
+            server_string,
+            session_token,
+            leaderboard_id,
+            limit,
+            next_cursor,
+        )
+        return LeaderboardResponse(
+            records=records,
+            next_cursor=next_cursor,
+        )
 
-            # Apply required limit.
-            endpoint += f"?limit={limit}"
+    async def get_records_page(
+        self,
+        server_string: str,
+        session_token: str,
+        leaderboard_id: str,
+        limit: int,
+        next_cursor: str | None = None,
+    ) -> tuple[List[Dict], str]:
+        """Retrieves leaderboard records as raw upstream dicts"""
+        try:
+            records, next_cursor = await self.fetch_records_page(
+                server_string,
+                session_token,
+                leaderboard_id,
+                limit,
+                next_cursor,
+            )
+            LeaderboardAnalyticsService.observe(server_string, leaderboard_id, records)
+            return records, next_cursor
+        except httpx.HTTPError as e:
+            raise HTTPException(
+                status_code=500, detail=f"Failed to get leaderboard records: {str(e)}"
+            )
 
-            # Use optional cursor.
-            if next_cursor is None:
-                print("No cursor applied.")
-            else:
-                endpoint += f"&cursor={next_cursor}"
+    async def get_global_records(
+        self,
+        server_strings: List[str],
+        session_tokens: List[str],
+        leaderboard_id: str,
+        limit: int,
+        next_cursor: str | None = None,
+        order: SortOrder = SortOrder.DESCENDING,
+    ) -> LeaderboardResponse:
+        """Merges the sorted leaderboards of several shards into one global page"""
+        records, next_cursor = await self.get_global_records_page(
+            server_strings,
+            session_tokens,
+            leaderboard_id,
+            limit,
+            next_cursor,
+            order,
+        )
+        return LeaderboardResponse(
+            records=records,
+            next_cursor=next_cursor,
+        )
 
-            response: Any = requests.get(endpoint, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            print("---")
-            print(data)
-            print("---")
-            if not data:
-                return LeaderboardResponse(
-                    records=[],
-                    next_cursor="",
-                )
-
-            next_cursor = ""
-            if "next_cursor" in data:
-                next_cursor = data["next_cursor"]
-
-            return LeaderboardResponse(
-                records=data["records"],
-                next_cursor=next_cursor,
+    async def get_global_records_page(
+        self,
+        server_strings: List[str],
+        session_tokens: List[str],
+        leaderboard_id: str,
+        limit: int,
+        next_cursor: str | None = None,
+        order: SortOrder = SortOrder.DESCENDING,
+    ) -> tuple[List[Dict], str]:
+        """Merges the shards' leaderboards into one page of raw upstream dicts"""
+        try:
+            return await self.fetch_global_page(
+                server_strings,
+                session_tokens,
+                leaderboard_id,
+                limit,
+                next_cursor,
+                order,
             )
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             raise HTTPException(
-                status_code=500, detail=f"Failed to get leaderboard records: {str(e)}"
+                status_code=500,
+                detail=f"Failed to get global leaderboard records: {str(e)}",
             )
+
+    async def fetch_global_page(
+        self,
+        server_strings: List[str],
+        session_tokens: List[str],
+        leaderboard_id: str,
+        limit: int,
+        next_cursor: str | None = None,
+        order: SortOrder = SortOrder.DESCENDING,
+    ) -> tuple[List[Dict], str]:
+        """
+        Runs a heap-based k-way merge over the shards' score-ordered pages.
+
+        Each shard is read one page at a time and a further page is only
+        requested once the merge has consumed the previous one, so no shard is
+        downloaded past the records needed for the global top `limit`. `order`
+        must match the sort order the leaderboard is configured with, and each
+        record's rank is replaced by its rank across all shards.
+        """
+        if not 1 <= limit <= MAX_RECORDS_LIMIT:
+            # Without a positive limit the merge would never stop and walk every shard.
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Limit must be between 1 and {MAX_RECORDS_LIMIT}.",
+            )
+        rank_offset, positions = decode_shard_cursor(
+            next_cursor, order, len(server_strings)
+        )
+        shards = [
+            _ShardReader(
+                self, server_string, session_token, leaderboard_id, limit, position
+            )
+            for server_string, session_token, position in zip(
+                server_strings, session_tokens, positions
+            )
+        ]
+        await asyncio.gather(*(shard.load() for shard in shards))
+
+        heap = [
+            (_sort_key(shard.peek(), order), index)
+            for index, shard in enumerate(shards)
+            if shard.peek() is not None
+        ]
+        heapq.heapify(heap)
+
+        records: List[Dict] = []
+        while heap:
+            _, index = heapq.heappop(heap)
+            shard = shards[index]
+            rank = rank_offset + len(records) + 1
+            records.append({**shard.pop(), "rank": str(rank)})
+            if len(records) == limit:
+                break
+            if shard.peek() is None:
+                await shard.load()
+            if shard.peek() is not None:
+                heapq.heappush(heap, (_sort_key(shard.peek(), order), index))
+
+        if all(shard.position() is None for shard in shards):
+            return records, ""
+        return records, encode_shard_cursor(
+            rank_offset + len(records),
+            order,
+            [shard.position() for shard in shards],
+        )
+
+
+def _sort_key(record: Dict, order: SortOrder) -> tuple[int, int]:
+    # Nakama serialises int64 fields as strings; score breaks ties on subscore.
+    key = int(record.get("score", 0)), int(record.get("subscore", 0))
+    if order == SortOrder.DESCENDING:
+        return -key[0], -key[1]
+    return key
+
+
+class _ShardReader:
+    """Buffers one page of a single shard's leaderboard for the k-way merge."""
+
+    def __init__(
+        self,
+        service: LeaderboardService,
+        server_string: str,
+        session_token: str,
+        leaderboard_id: str,
+        limit: int,
+        position: ShardPosition | None,
+    ):
+        self._service = service
+        self._server_string = server_string
+        self._session_token = session_token
+        self._leaderboard_id = leaderboard_id
+        self._limit = limit
+        self._records: List[Dict] = []
+        self._offset = 0
+        self._page_cursor = ""
+        # A shard without a position has already been fully merged.
+        self._pending = position
+
+    async def load(self) -> None:
+        """Fetches the page the shard's position points at, if any"""
+        if self._pending is None:
+            return
+        cursor, offset = self._pending
+        self._pending = None
+        records, next_cursor = await self._service.fetch_records_page(
+            self._server_string,
+            self._session_token,
+            self._leaderboard_id,
+            # Make sure the resumed page still reaches past the records already merged.
+            max(self._limit, offset + 1),
+            cursor or None,
+        )
+        self._records = records
+        self._offset = offset
+        self._page_cursor = cursor
+        if next_cursor:
+            self._pending = (next_cursor, 0)
+
+    def peek(self) -> Dict | None:
+        if self._offset < len(self._records):
+            return self._records[self._offset]
+        return None
+
+    def pop(self) -> Dict:
+        record = self._records[self._offset]
+        self._offset += 1
+        return record
+
+    def position(self) -> ShardPosition | None:
+        """Where the next global page should resume reading this shard"""
+        if self._offset < len(self._records):
+            return (self._page_cursor, self._offset)
+        return self._pending
@@ -4,3 +4,11 @@ class ApiDescriptions:
     APP = "A high-performance FastAPI service that seamlessly integrates with Nakama game servers."
     API_KEY = "API key for your Nakama server."
     SESSION_TOKEN = "Token of the currently authenticated user."
+    API_KEYS = "API keys of the Nakama servers to merge, one per shard."
+    SHARD_GROUP = "Name of a configured group of Nakama servers to merge."
+    SESSION_TOKENS = "Token of the authenticated user, either one shared by every shard or one per shard in shard order."
+    PERCENTILES = "Score percentiles to compute, between 0 and 100."
+    TOP_PERCENTS = "Return the minimum score needed to place in each of these top percentages."
+    MAX_AGE = "Seconds after the last full scan of the leaderboard before a new one is started in the background; the previous snapshot is served until it completes. The server enforces a minimum interval between scans."
+    ACCEPT = "application/vnd.apikama.columnar+json or application/msgpack for a compact column-oriented page; JSON otherwise."
+    SORT_ORDER = "Sort order the leaderboard is configured with on every shard: desc (highest score first) or asc."
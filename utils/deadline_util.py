@@ -0,0 +1,131 @@
+# Utility functions for propagating the request deadline to upstream calls
+
+import asyncio
+import os
+import time
+from contextvars import ContextVar, Token
+import httpx
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+
+# Load environment variables
+load_dotenv()
+
+# Header a client can send to override the server's default deadline, in seconds.
+DEADLINE_HEADER = "x-request-timeout"
+
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "10"))
+MAX_DEADLINE_SECONDS = float(os.getenv("MAX_REQUEST_DEADLINE_SECONDS", "60"))
+CONNECT_TIMEOUT_SECONDS = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT_SECONDS", "3"))
+
+# Monotonic time by which the current request must be answered.
+_deadline: ContextVar[float | None] = ContextVar("deadline", default=None)
+
+# Shared connection pool of this process, created on first use so it is never
+# inherited across a fork.
+_client: httpx.AsyncClient | None = None
+
+
+def parse_deadline(header_value: str | None) -> float:
+   """
+   Resolves the time budget of a request from its deadline header.
+
+   Args:
+       header_value: Value of the X-Request-Timeout header, if sent
+
+   Returns:
+       Budget in seconds, capped at MAX_DEADLINE_SECONDS
+
+   Raises:
+       ValueError: If the header is not a positive number
+   """
+   if header_value is None:
+      return DEFAULT_DEADLINE_SECONDS
+   seconds = float(header_value)
+   if not seconds > 0:
+      raise ValueError("Deadline must be positive")
+   return min(seconds, MAX_DEADLINE_SECONDS)
+
+
+def set_deadline(seconds: float) -> Token:
+   """
+   Starts the deadline of the current request.
+
+   Args:
+       seconds: Budget of the request from now
+
+   Returns:
+       Token for restoring the previous deadline
+   """
+   return _deadline.set(time.monotonic() + seconds)
+
+
+def reset_deadline(token: Token) -> None:
+   _deadline.reset(token)
+
+
+def remaining() -> float:
+   """
+   Seconds left before the current request's deadline.
+
+   Returns:
+       Remaining budget; the default budget when no deadline was started
+   """
+   deadline = _deadline.get()
+   if deadline is None:
+      return DEFAULT_DEADLINE_SECONDS
+   return deadline - time.monotonic()
+
+
+async def upstream_request(method: str, url: str, **kwargs) -> httpx.Response:
+   """
+   Sends a request to the Nakama server within the current request's deadline.
+
+   Connecting, each read and the call as a whole are bounded by the remaining
+   budget. Cancelling the awaiting request (e.g. because the client
+   disconnected) closes the upstream connection right away.
+
+   Args:
+       method: HTTP method
+       url: Upstream endpoint
+       **kwargs: Passed through to httpx.AsyncClient.request
+
+   Returns:
+       The upstream response
+
+   Raises:
+       HTTPException: 504 if the deadline is exhausted before the call completes
+   """
+   budget = remaining()
+   if budget <= 0:
+      raise _deadline_exceeded()
+   timeout = httpx.Timeout(budget, connect=min(CONNECT_TIMEOUT_SECONDS, budget))
+   try:
+      return await asyncio.wait_for(
+         _get_client().request(method, url, timeout=timeout, **kwargs),
+         budget,
+      )
+   except (asyncio.TimeoutError, httpx.TimeoutException):
+      raise _deadline_exceeded()
+
+
+async def close_upstream_client() -> None:
+   """Closes the shared connection pool, e.g. on application shutdown"""
+   global _client
+   if _client is not None:
+      await _client.aclose()
+      _client = None
+
+
+def _get_client() -> httpx.AsyncClient:
+   global _client
+   if _client is None:
+      _client = httpx.AsyncClient()
+   return _client
+
+
+def _deadline_exceeded() -> HTTPException:
+   return HTTPException(
+      status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+      detail="Request deadline exceeded.",
+   )
@@ -0,0 +1,136 @@
+# Utility functions for compact leaderboard page encodings
+
+from typing import Dict, List
+import msgpack
+from fastapi.responses import JSONResponse, Response
+from utils.time_util import to_epoch_seconds
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.apikama.columnar+json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Media types that select a compact format, including the legacy MessagePack name.
+_COMPACT_MEDIA_TYPES = {
+   COLUMNAR_MEDIA_TYPE: COLUMNAR_MEDIA_TYPE,
+   MSGPACK_MEDIA_TYPE: MSGPACK_MEDIA_TYPE,
+   "application/x-msgpack": MSGPACK_MEDIA_TYPE,
+}
+_JSON_MEDIA_TYPES = {"application/json", "application/*", "*/*"}
+
+_DICTIONARY_FIELDS = ("leaderboard_id", "owner_id", "username")
+_INTEGER_FIELDS = ("score", "num_score", "max_num_score", "rank")
+_TIMESTAMP_FIELDS = ("create_time", "update_time", "expiry_time")
+
+# Documents the compact formats on endpoints that support them.
+LEADERBOARD_PAGE_RESPONSES: Dict = {
+   200: {"content": {COLUMNAR_MEDIA_TYPE: {}, MSGPACK_MEDIA_TYPE: {}}}
+}
+
+
+def negotiate_leaderboard_format(accept: str | None) -> str | None:
+   """
+   Picks the leaderboard page format from an Accept header.
+
+   Args:
+       accept: Value of the request's Accept header
+
+   Returns:
+       COLUMNAR_MEDIA_TYPE or MSGPACK_MEDIA_TYPE when the client prefers a
+       compact format, otherwise None for the default JSON response
+   """
+   if not accept:
+      return None
+   best: str | None = None
+   # Higher q wins; on equal q the more specific media range wins.
+   best_rank = (0.0, -1)
+   for part in accept.split(","):
+      media_type, *params = [item.strip() for item in part.split(";")]
+      media_type = media_type.lower()
+      quality = 1.0
+      for param in params:
+         name, _, value = param.partition("=")
+         if name.strip() == "q":
+            try:
+               quality = float(value)
+            except ValueError:
+               quality = 0.0
+      if quality <= 0:
+         continue
+      if media_type in _COMPACT_MEDIA_TYPES:
+         candidate = _COMPACT_MEDIA_TYPES[media_type]
+      elif media_type in _JSON_MEDIA_TYPES:
+         candidate = None
+      else:
+         continue
+      rank = (quality, _specificity(media_type))
+      if rank > best_rank:
+         best, best_rank = candidate, rank
+   return best
+
+
+def _specificity(media_type: str) -> int:
+   if media_type == "*/*":
+      return 0
+   if media_type.endswith("/*"):
+      return 1
+   return 2
+
+
+def encode_columnar(records: List[Dict], next_cursor: str) -> Dict:
+   """
+   Lays out raw Nakama leaderboard records as one array per field.
+
+   Ids and usernames are dictionary-encoded as a list of distinct values plus
+   an index into it per record. Ranks and counters are integers and
+   timestamps are Unix epoch seconds (0 when unset).
+
+   Args:
+       records: Records as returned by the Nakama API
+       next_cursor: Cursor to the next page, empty on the last page
+
+   Returns:
+       Column-oriented page, ready for JSON or MessagePack serialisation
+   """
+   dictionaries: Dict[str, Dict[str, int]] = {field: {} for field in _DICTIONARY_FIELDS}
+   columns: Dict[str, List[int]] = {
+      field: [] for field in _DICTIONARY_FIELDS + _INTEGER_FIELDS + _TIMESTAMP_FIELDS
+   }
+   for record in records:
+      for field in _DICTIONARY_FIELDS:
+         values = dictionaries[field]
+         columns[field].append(values.setdefault(record.get(field) or "", len(values)))
+      for field in _INTEGER_FIELDS:
+         columns[field].append(int(record.get(field) or 0))
+      for field in _TIMESTAMP_FIELDS:
+         columns[field].append(to_epoch_seconds(record.get(field)))
+
+   page: Dict = {"count": len(records), "next_cursor": next_cursor}
+   for field in _DICTIONARY_FIELDS:
+      page[field] = {"values": list(dictionaries[field]), "index": columns[field]}
+   for field in _INTEGER_FIELDS + _TIMESTAMP_FIELDS:
+      page[field] = columns[field]
+   return page
+
+
+def leaderboard_page_response(
+   records: List[Dict], next_cursor: str, media_type: str
+) -> Response:
+   """
+   Encodes a page of raw records in the negotiated compact format.
+
+   Args:
+       records: Records as returned by the Nakama API
+       next_cursor: Cursor to the next page, empty on the last page
+       media_type: COLUMNAR_MEDIA_TYPE or MSGPACK_MEDIA_TYPE
+
+   Returns:
+       Response carrying the encoded page
+   """
+   page = encode_columnar(records, next_cursor)
+   headers = {"Vary": "Accept"}
+   if media_type == MSGPACK_MEDIA_TYPE:
+      return Response(
+         content=msgpack.packb(page, use_bin_type=True),
+         media_type=MSGPACK_MEDIA_TYPE,
+         headers=headers,
+      )
+   return JSONResponse(content=page, media_type=COLUMNAR_MEDIA_TYPE, headers=headers)
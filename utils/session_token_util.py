@@ -0,0 +1,68 @@
+# Utility functions for reading Nakama session tokens
+
+import base64
+import binascii
+import hashlib
+import json
+import time
+
+
+def get_session_user_id(session_token: str) -> str | None:
+   """
+   Reads the user id from an unexpired Nakama session token.
+
+   The token's signature is not checked here; only Nakama can verify it.
+   Callers must not treat the id as proof that the token is valid.
+
+   Args:
+       session_token: JWT issued by Nakama on authentication
+
+   Returns:
+       The "uid" claim, or None if the token is malformed or expired
+   """
+   claims = _decode_claims(session_token)
+   if claims is None or claims.get("exp", 0) <= time.time():
+      return None
+   return claims.get("uid")
+
+
+def get_session_expiry(session_token: str) -> float:
+   """
+   Reads the expiry time from a Nakama session token, without verifying it.
+
+   Args:
+       session_token: JWT issued by Nakama on authentication
+
+   Returns:
+       The "exp" claim in epoch seconds, or 0 if the token is malformed
+   """
+   claims = _decode_claims(session_token)
+   if claims is None:
+      return 0
+   try:
+      return float(claims.get("exp", 0))
+   except (TypeError, ValueError):
+      return 0
+
+
+def token_digest(session_token: str) -> str:
+   """
+   Hashes a session token so caches can remember it without storing it.
+
+   Args:
+       session_token: JWT issued by Nakama on authentication
+
+   Returns:
+       Hex SHA-256 digest of the token
+   """
+   return hashlib.sha256(session_token.encode("utf-8")).hexdigest()
+
+
+def _decode_claims(session_token: str) -> dict | None:
+   try:
+      payload = session_token.split(".")[1]
+      payload += "=" * (-len(payload) % 4)
+      claims = json.loads(base64.urlsafe_b64decode(payload))
+   except (IndexError, binascii.Error, ValueError):
+      return None
+   return claims if isinstance(claims, dict) else None
@@ -0,0 +1,75 @@
+# Utility functions for the composite cursor of sharded leaderboard reads
+
+import base64
+import binascii
+import json
+from fastapi import HTTPException, status
+from enums.sort_order import SortOrder
+
+# Upstream cursor of the page being read and how many of its records were consumed.
+ShardPosition = tuple[str, int]
+
+
+def encode_shard_cursor(
+   rank_offset: int, order: SortOrder, positions: list[ShardPosition | None]
+) -> str:
+   """
+   Encodes the global read position of a sharded leaderboard into one opaque cursor.
+
+   Args:
+       rank_offset: Number of records on all previous global pages
+       order: Sort order the pages were merged in
+       positions: One entry per shard, in request order; None marks an exhausted shard
+
+   Returns:
+       URL-safe base64 string to hand back to the client as next_cursor
+   """
+   payload = {
+      "r": rank_offset,
+      "d": order.value,
+      "s": [list(position) if position else None for position in positions],
+   }
+   raw: bytes = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+   return base64.urlsafe_b64encode(raw).decode("utf-8")
+
+
+def decode_shard_cursor(
+   cursor: str | None, order: SortOrder, shard_count: int
+) -> tuple[int, list[ShardPosition | None]]:
+   """
+   Decodes a composite cursor produced by encode_shard_cursor.
+
+   Args:
+       cursor: Cursor from a previous page, or None/empty for the first page
+       order: Sort order of the current request
+       shard_count: Number of shards in the current request
+
+   Returns:
+       The global rank offset and one position per shard; the first page
+       starts every shard at its beginning
+
+   Raises:
+       HTTPException: If the cursor is malformed or was issued for a different
+       shard set or sort order
+   """
+   if not cursor:
+      return 0, [("", 0)] * shard_count
+   try:
+      payload = json.loads(base64.urlsafe_b64decode(cursor.encode("utf-8")))
+      rank_offset = int(payload["r"])
+      cursor_order = SortOrder(payload["d"])
+      positions = [
+         (str(entry[0]), int(entry[1])) if entry is not None else None
+         for entry in payload["s"]
+      ]
+   except (binascii.Error, ValueError, TypeError, IndexError, KeyError):
+      raise HTTPException(
+         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+         detail="Invalid leaderboard cursor.",
+      )
+   if len(positions) != shard_count or cursor_order != order:
+      raise HTTPException(
+         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+         detail="Cursor does not match the requested shards and order.",
+      )
+   return rank_offset, positions
@@ -0,0 +1,34 @@
+# Utility functions for resolving named groups of regional Nakama servers
+
+import os
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+
+# Load environment variables
+load_dotenv()
+
+
+def get_shard_group(name: str) -> list[str]:
+   """
+   Looks up the API keys registered for a named shard group.
+
+   Groups are configured as comma-separated API keys in environment
+   variables named SHARD_GROUP_<NAME>, e.g. SHARD_GROUP_GLOBAL=key1,key2
+
+   Args:
+       name: Group name, case-insensitive
+
+   Returns:
+       API keys of every shard in the group, in configured order
+
+   Raises:
+       HTTPException: If no group with that name is configured
+   """
+   value = os.getenv(f"SHARD_GROUP_{name.upper()}", "")
+   api_keys = [key.strip() for key in value.split(",") if key.strip()]
+   if not api_keys:
+      raise HTTPException(
+         status_code=status.HTTP_404_NOT_FOUND,
+         detail=f"Unknown shard group '{name}'.",
+      )
+   return api_keys
@@ -0,0 +1,18 @@
+# Utility functions for converting Nakama timestamps
+
+from datetime import datetime
+
+
+def to_epoch_seconds(timestamp: str | None) -> int:
+   """
+   Converts a Nakama RFC 3339 timestamp to Unix epoch seconds.
+
+   Args:
+       timestamp: Timestamp such as "2024-12-20T15:04:05Z"; may be empty
+
+   Returns:
+       Seconds since the epoch, or 0 when no timestamp is set
+   """
+   if not timestamp:
+      return 0
+   return int(datetime.fromisoformat(timestamp).timestamp())